@@ -0,0 +1,256 @@
+# Shared capture loop for the RngKitCLI entry points.  Scheduling,
+# popcount and the binary/csv output live here so every script picks up
+# the same optimizations (and the same fixes) from one place.
+
+__all__ = ['NoColor', 'capture_loop', 'ensure_data_dir',
+           'format_duration', 'popcount', 'pseudo_read']
+
+# Default imports
+import os
+import sys
+import time
+from time import localtime
+
+# Popcount: prefer int.bit_count (Python 3.10+, dispatches to the CPython
+# C popcount); on older interpreters fall back to a NumPy 256-entry
+# lookup table, or to a pure-Python per-byte table when NumPy is missing.
+try:
+    (0).bit_count
+
+    def popcount(data):
+        return int.from_bytes(data, 'big').bit_count()
+except AttributeError:
+    try:
+        import numpy as np
+
+        # a uint8 LUT keeps the gathered array in the narrowest lanes so
+        # np.add.reduce can vectorize the final sum
+        POP8 = np.frombuffer(bytes(bin(i).count('1') for i in range(256)),
+                             dtype=np.uint8)
+
+        def popcount(data):
+            arr = np.frombuffer(data, dtype=np.uint8)
+            return int(np.add.reduce(POP8[arr], dtype=np.int64))
+    except ImportError:
+        _POP = tuple(bin(i).count('1') for i in range(256))
+
+        def popcount(data):
+            # sum + map keep the per-byte loop inside the C eval loop
+            return sum(map(_POP.__getitem__, data))
+
+# Linux page-cache hint: the .bin stream is write-once, so the kernel
+# can drop its cached pages after each flush (keeps RSS flat on
+# multi-hour captures)
+_HAVE_FADVISE = hasattr(os, 'posix_fadvise')
+
+# raw stderr fd for the status line (stderr is the conventional stream
+# for progress UIs, so piped stdout stays clean): one os.write per
+# redraw instead of a TextIOWrapper encode/lock/flush cycle.  None when
+# stderr has no fd (captured/redirected to a non-file object).
+try:
+    _STATUS_FD = sys.stderr.fileno()
+except (AttributeError, OSError, ValueError):
+    _STATUS_FD = None
+
+# honour the usual opt-outs for progress redraws: dumb terminals, CI
+# logs, and an explicit RNGKIT_PROGRESS=off
+_STATUS_OFF = (os.environ.get('RNGKIT_PROGRESS') == 'off'
+               or os.environ.get('TERM') == 'dumb'
+               or 'CI' in os.environ)
+
+
+# Pseudo source: one secrets.token_bytes call per sample meant one
+# getrandom syscall per sample.  Stream from a larger os.urandom chunk
+# instead - same CSPRNG quality, ~256x fewer syscalls at 256-byte blocks.
+_prng_buf = bytearray()
+
+
+def pseudo_read(buf):
+    n = len(buf)
+    if len(_prng_buf) < n:
+        _prng_buf.extend(os.urandom(max(n, 65536)))
+    buf[:] = _prng_buf[:n]
+    del _prng_buf[:n]
+    return n
+
+
+def format_duration(seconds):
+    # 'Hh Mm Ss' from a seconds count via one integer divmod chain; no
+    # float modulo, so long runs never show 59.999999s artifacts
+    total = int(seconds + 0.5)
+    h, rem = divmod(total, 3600)
+    m, s = divmod(rem, 60)
+    if h:
+        return f"{h}h {m}m {s}s"
+    if m:
+        return f"{m}m {s}s"
+    return f"{s}s"
+
+
+_data_dir = None
+
+
+def ensure_data_dir():
+    # Resolve and create the output directory: RNGKIT_DATA_DIR when
+    # set, otherwise 1-SavedFiles next to the scripts.  Cached per
+    # process so repeat calls cost a name lookup; creation is EAFP - a
+    # single mkdir, ignoring FileExistsError - rather than an exists()
+    # stat walk on every capture.
+    global _data_dir
+    if _data_dir is not None:
+        return _data_dir
+    base = os.environ.get('RNGKIT_DATA_DIR') or os.path.join(
+        os.path.abspath(os.path.dirname(__file__)), '1-SavedFiles')
+    try:
+        os.mkdir(base)
+    except FileExistsError:
+        pass
+    except FileNotFoundError:
+        os.makedirs(base, exist_ok=True)
+    _data_dir = base
+    return base
+
+
+class NoColor:
+    # stand-in for colorama's Fore: attribute access yields an empty
+    # string, so output is plain uncolored text.  The entry points use
+    # it when imported as libraries, and capture_loop when the caller
+    # passes no Fore.
+    def __getattr__(self, name):
+        return ''
+
+
+_NO_COLOR = NoColor()
+
+
+def capture_loop(read_fn, sample_value, interval_value, label, fore=None):
+    # Run the capture until Ctrl-C.  read_fn(buf) must fill buf with
+    # random bytes and return the count actually read; label goes into
+    # the output file name ('trng' or 'pseudo'); fore is an optional
+    # colorama Fore for the status prints.
+    fore = fore if fore is not None else _NO_COLOR
+    blocksize = int(sample_value / 8)
+    # batch several samples per read when the interval is short; a read
+    # costs about the same regardless of size.  Non-positive intervals
+    # mean free-running max-speed sampling, one sample per read.
+    batch = (max(1, int(0.25 / interval_value))
+             if 0 < interval_value < 1 else 1)
+    # reusable read buffer: one heap allocation for the whole capture
+    buf = bytearray(blocksize * batch)
+    mv = memoryview(buf)
+    file_name = time.strftime(
+        f"%Y%m%d-%H%M%S_{label}_s{sample_value}_i{interval_value}")
+    file_name = os.path.join(ensure_data_dir(), file_name)
+    bin_path = file_name + '.bin'
+    csv_path = file_name + '.csv'
+    num_loop = 1
+    total_bytes = 0
+    print(f"{fore.GREEN}Starting capture:\n")
+    print(f"{fore.YELLOW}Saving to file {file_name}\n")
+    # raw fd for the csv; records are queued and written in batches
+    csv_fd = os.open(csv_path,
+                     os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    pending = bytearray()
+    # local-time offset captured once; the loop formats timestamps with
+    # plain integer arithmetic instead of a libc strftime round-trip
+    tz_off = localtime().tm_gmtoff
+    run_started = time.monotonic()
+    try:
+        # open the binary file once and reuse the handle; opening per
+        # loop costs open/fstat/close syscalls for every tiny append
+        with open(bin_path, "ab", buffering=64 * 1024) as bin_file:
+            bin_fd = bin_file.fileno()
+            # fixed-width record 'HH:MM:SS NNNNNN\n' assembled in
+            # place; the timestamp slice is rebuilt only when the
+            # second changes and the whole record goes out in one
+            # write.  The count field is sized for the largest possible
+            # ones count (= sample_value) so a big bit rate can never
+            # grow the record and corrupt the fixed-width stream.
+            cnt_w = max(6, len(str(sample_value)))
+            cnt_fmt = b'%%0%dd' % cnt_w
+            rec_len = 10 + cnt_w
+            rec = bytearray(rec_len)
+            rec[8:9] = b' '
+            rec[rec_len - 1:rec_len] = b'\n'
+            last_sec = -1
+            # bind everything the loop touches to local names once;
+            # blocksize, interval and the read function are fixed for
+            # the whole run, so the hot path runs on LOAD_FAST only
+            bin_write = bin_file.write
+            os_write = os.write
+            _popcount = popcount
+            clock = time.time
+            monotonic = time.monotonic
+            sleep = time.sleep
+            step = interval_value * batch
+            next_deadline = monotonic() + step
+            # a \r status line is only useful on a terminal; when
+            # redirected, piped, or switched off via the environment,
+            # skip the write entirely so console I/O never stalls the
+            # sample deadline
+            show_status = (not _STATUS_OFF and _STATUS_FD is not None
+                           and sys.stderr.isatty())
+            # constant parts of the status frame encoded once; per
+            # redraw only the two counters are formatted, as bytes
+            status_fmt = (f"{fore.CYAN}Collecting data - Loop: ".encode()
+                          + b'%d - Total bytes collected: %d\r')
+            last_print = 0.0
+            while True:
+                start_cap = clock()
+                # single updating status line, redrawn at most once per
+                # second no matter how fast the loop spins; written as
+                # bytes straight to the fd, bypassing the text layer
+                if show_status and start_cap - last_print >= 1.0:
+                    os_write(_STATUS_FD,
+                             status_fmt % (num_loop, total_bytes))
+                    last_print = start_cap
+                try:
+                    n = read_fn(buf)  # fill the reused buffer
+                except Exception:
+                    print("Error reading from random source")
+                    break
+                bin_write(mv[:n])
+                # flush on a schedule rather than per sample; the
+                # with-block close flushes whatever remains at shutdown
+                if num_loop % 32 == 0:
+                    bin_file.flush()
+                    if _HAVE_FADVISE:
+                        os.posix_fadvise(bin_fd, 0, 0,
+                                         os.POSIX_FADV_DONTNEED)
+                total_bytes += n
+                # one csv record per sample slice; timestamps are
+                # synthesized at start + i * interval for batched reads
+                for i in range(0, n, blocksize):
+                    num_ones_array = _popcount(mv[i:i + blocksize])
+                    t = int(start_cap + (i // blocksize) * interval_value) + tz_off
+                    if t != last_sec:
+                        rec[0:8] = b'%02d:%02d:%02d' % (
+                            (t // 3600) % 24, (t // 60) % 60, t % 60)
+                        last_sec = t
+                    rec[9:rec_len - 1] = cnt_fmt % num_ones_array
+                    pending += rec
+                # one write syscall per ~32 queued records
+                if len(pending) >= 32 * rec_len:
+                    os_write(csv_fd, pending)
+                    pending.clear()
+                num_loop += 1
+                # sleep to the absolute deadline so the cadence never
+                # drifts; with no positive step there is no deadline
+                if step > 0:
+                    dt = next_deadline - monotonic()
+                    if dt > 0:
+                        sleep(dt)
+                    next_deadline += step
+                    # if an iteration overran, skip ahead to the next slot
+                    while next_deadline < monotonic():
+                        next_deadline += step
+    except KeyboardInterrupt:
+        print()  # step off the status line
+        print(f"{fore.YELLOW} Capture stopped by user, closing and exiting...")
+        elapsed = format_duration(time.monotonic() - run_started)
+        print(f"{fore.GREEN}Total bytes collected: {total_bytes} in {elapsed}, saved to {file_name}")
+    finally:
+        if pending:  # drain the queued tail before closing
+            os.write(csv_fd, pending)
+        os.close(csv_fd)
+    return total_bytes
@@ -0,0 +1,149 @@
+# Offline analysis helpers for RngKitCLI captures (.bin/.csv pairs in
+# 1-SavedFiles).  The per-block popcount over a whole .bin file is
+# vectorized with NumPy when available and falls back to the shared
+# pure-Python popcount otherwise.
+
+__all__ = ['read_bin_counts', 'read_csv_counts', 'zscores',
+           'analyze_bin', 'concat_csv']
+
+import math
+import mmap
+import os
+import shutil
+
+from capture import popcount
+
+try:
+    import numpy as np
+
+    # 256-entry per-byte popcount table, same layout as capture.py
+    POP8 = np.frombuffer(bytes(bin(i).count('1') for i in range(256)),
+                         dtype=np.uint8)
+except ImportError:
+    np = None
+
+
+def read_bin_counts(bin_path, block_bits):
+    # Return the number of ones in each block_bits-sized block of a
+    # .bin capture as a list of ints.  The file is read once and all
+    # blocks are popcounted in a single vectorized pass instead of
+    # looping block by block in the interpreter.
+    block_bytes = block_bits // 8
+    # size everything from the file length up front so a trailing
+    # partial block never enters memory and no post-read copy is needed
+    n_blocks = os.path.getsize(bin_path) // block_bytes
+    if n_blocks == 0:
+        return []
+    with open(bin_path, 'rb') as f:
+        if np is not None:
+            # map the file instead of read()ing it: the popcount gather
+            # runs straight over the page cache with no copy into a
+            # Python bytes buffer
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if hasattr(mm, 'madvise'):
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+                arr = np.frombuffer(mm, dtype=np.uint8,
+                                    count=n_blocks * block_bytes)
+                ones = POP8[arr].reshape(n_blocks, block_bytes).sum(
+                    axis=1, dtype=np.int64).tolist()
+                # drop the frombuffer view before the map closes; a
+                # live buffer export makes mmap.close() raise
+                del arr
+            return ones
+        data = f.read(n_blocks * block_bytes)
+    return [popcount(data[i:i + block_bytes])
+            for i in range(0, len(data), block_bytes)]
+
+
+def zscores(ones, block_bits):
+    # Cumulative z-test over the per-block ones counts: for each prefix
+    # of the capture, how far the running mean sits from the expected
+    # block_bits/2 in standard errors.  One vectorized cumsum pass with
+    # NumPy instead of a per-row expanding mean.
+    mean = 0.5 * block_bits
+    sd = math.sqrt(block_bits * 0.25)
+    if np is not None:
+        counts = np.asarray(ones, dtype=np.float64)
+        n = np.arange(1, len(counts) + 1, dtype=np.float64)
+        cummean = np.cumsum(counts) / n
+        z = (cummean - mean) / (sd / np.sqrt(n))
+        return z.tolist()
+    out = []
+    csum = 0
+    for i, c in enumerate(ones, 1):
+        csum += c
+        out.append((csum / i - mean) / (sd / math.sqrt(i)))
+    return out
+
+
+def read_csv_counts(csv_path):
+    # The capture already popcounted every block: each fixed-width
+    # 'HH:MM:SS NNNNNN\n' csv record carries the count at a constant
+    # offset, so analysis can slice the counts straight out instead of
+    # walking the .bin bytes a second time.  Raises ValueError for
+    # files not in that format (legacy captures wrote variable-width
+    # records).
+    with open(csv_path, 'rb') as f:
+        data = f.read()
+    if not data:
+        return []
+    rec_len = data.find(b'\n') + 1
+    # timestamp, space and at least a six-digit count; every record
+    # the same length and newline-terminated
+    if rec_len < 16 or len(data) % rec_len:
+        raise ValueError(f'{csv_path} is not a fixed-width capture csv')
+    if data[rec_len - 1::rec_len].count(b'\n') * rec_len != len(data):
+        raise ValueError(f'{csv_path} is not a fixed-width capture csv')
+    return [int(data[i + 9:i + rec_len - 1])
+            for i in range(0, len(data), rec_len)]
+
+
+def analyze_bin(bin_path, block_bits):
+    # Convenience wrapper: per-block ones counts plus their cumulative
+    # z-scores for one capture.  Prefers the sibling .csv, which holds
+    # the counts computed during capture; without it (or NumPy) the two
+    # passes are fused into a single walk over the blocks.
+    csv_path = bin_path[:-4] + '.csv' if bin_path.endswith('.bin') else None
+    if csv_path and os.path.exists(csv_path):
+        try:
+            ones = read_csv_counts(csv_path)
+        except ValueError:
+            pass  # legacy variable-width csv; recount from the .bin
+        else:
+            # trust the csv only when it matches the .bin at this
+            # block size: a capture recorded at a different blocksize,
+            # or a tail lost to an unclean shutdown (records are
+            # queued in batches), must recount rather than return
+            # mismatched stats
+            if len(ones) == os.path.getsize(bin_path) // (block_bits // 8):
+                return ones, zscores(ones, block_bits)
+    if np is not None:
+        ones = read_bin_counts(bin_path, block_bits)
+        return ones, zscores(ones, block_bits)
+    block_bytes = block_bits // 8
+    n_blocks = os.path.getsize(bin_path) // block_bytes
+    with open(bin_path, 'rb') as f:
+        data = f.read(n_blocks * block_bytes)
+    mean = 0.5 * block_bits
+    sd = math.sqrt(block_bits * 0.25)
+    ones = []
+    z = []
+    csum = 0
+    for i in range(n_blocks):
+        c = popcount(data[i * block_bytes:(i + 1) * block_bytes])
+        ones.append(c)
+        csum += c
+        n = i + 1
+        z.append((csum / n - mean) / (sd / math.sqrt(n)))
+    return ones, z
+
+
+def concat_csv(csv_paths, out_path):
+    # Concatenate capture .csv files into one.  Copies in 1 MiB blocks
+    # through shutil.copyfileobj (zero-copy between fds where the
+    # platform supports it) instead of iterating lines in Python; the
+    # records carry no header line, so every file is copied whole.
+    with open(out_path, 'wb') as out:
+        for path in csv_paths:
+            with open(path, 'rb') as f:
+                shutil.copyfileobj(f, out, length=1 << 20)
@@ -0,0 +1,98 @@
+# Shared TrueRNG discovery and serial-port handling for the RngKitCLI
+# entry points
+
+__all__ = ['KNOWN_DEVICES', 'find_rng', 'start_serial', 'close_serial']
+
+import os
+import re
+import time
+
+# pyserial is imported inside the functions that touch hardware, so
+# importing this module (e.g. for the pseudo path or analysis) never
+# pays for the USB stack
+
+# USB VID:PID -> device label; one table drives the whole scan
+KNOWN_DEVICES = {
+    '04D8:F5FE': 'TrueRNG',
+    '16D0:0AA0': 'TrueRNGPro',
+    '04D8:EBB5': 'TrueRNGproV2',
+}
+
+# pull the VID:PID token out of a hwid string once per port instead of
+# substring-scanning the whole string per known device
+_VID_PID = re.compile(r'VID:PID=([0-9A-F]{4}:[0-9A-F]{4})', re.I)
+
+# USB enumeration can take tens of milliseconds and stall on some
+# drivers; back-to-back probes within the TTL share one scan
+_SCAN_TTL = 2.0
+_scan_cache = (0.0, None)
+
+
+def _comports():
+    global _scan_cache
+    now = time.monotonic()
+    ts, ports = _scan_cache
+    if ports is None or now - ts >= _SCAN_TTL:
+        from serial.tools import list_ports
+        ports = list_ports.comports()
+        _scan_cache = (now, ports)
+    return ports
+
+
+def find_rng(color=''):
+    # Scan the com ports once and return the first TrueRNG port found,
+    # or None. color is an optional ANSI prefix for the status prints.
+    print("Searching for RNG device...\n")
+    for port in _comports():
+        match = _VID_PID.search(port.hwid)
+        if match:
+            label = KNOWN_DEVICES.get(match.group(1).upper())
+            if label:
+                print(f'{color}Found {label} on {port.device} \n')
+                return port.device
+    return None
+
+
+def start_serial(rng_com_port, color=''):
+    import serial
+
+    print('==================================================\n')
+
+    # Print which port we're using
+    print(f'{color}Using com port:  ' + str(rng_com_port), "\n")
+
+    # Try to setup and open the comport
+    ser = serial.Serial(port=rng_com_port, timeout=10)  # timeout set at 10 seconds in case the read fails
+
+    # Open the serial port if it isn't open
+    if(ser.isOpen() == False):
+        ser.open()
+
+    # Enlarge the OS receive buffer (Windows only) so batched reads of
+    # several samples never overflow the small default driver buffer
+    if hasattr(ser, 'set_buffer_size'):
+        try:
+            ser.set_buffer_size(rx_size=1 << 16)
+        except Exception:
+            pass
+
+    # Set Data Terminal Ready to start flow
+    ser.setDTR(True)
+
+    # This clears the receive buffer so we aren't using buffered data
+    ser.flushInput()
+    return ser
+
+
+def close_serial(ser):
+    if os.name == 'posix':
+        # restore blocking reads (VMIN=1) in-process; forking an stty
+        # subprocess also left the port name unquoted in a shell
+        import termios
+        try:
+            attrs = termios.tcgetattr(ser.fileno())
+            attrs[6][termios.VMIN] = 1
+            termios.tcsetattr(ser.fileno(), termios.TCSANOW, attrs)
+        except Exception:
+            pass
+    ser.close()